@@ -29,6 +29,8 @@ class WishboneL2Cache(wiring.Component):
     this bus in order to fill / evict cache lines. The cache will issue burst
     transactions of length `burst_len` whenever a cache line is to be evicted
     (written to the backing store) or refilled (read from the backing store).
+    When a dirty line is replaced, the eviction and refill bursts are issued
+    back-to-back without releasing `cyc`, so they are not re-arbitrated.
 
     `cachesize_words` (in `data_width` words) is the size of the data store
     and must be a power of 2.
@@ -203,7 +205,11 @@ class WishboneL2Cache(wiring.Component):
                     tag_di.valid.eq(1),
                     tag_wr_port.en.eq(1),
                 ]
-                # Deassert stb between EVICT/REFILL
+                # Deassert stb between EVICT/REFILL, but keep cyc asserted so the
+                # write->read turnaround stays inside one bus tenure. Otherwise
+                # an upstream arbiter may hand the backing store to another
+                # master between the writeback and refill of the same line.
+                m.d.comb += slave.cyc.eq(1)
                 m.next = "REFILL"
 
             with m.State("REFILL"):
@@ -8,13 +8,12 @@
 from amaranth              import *
 from amaranth.lib          import wiring, data, stream
 from amaranth.lib.wiring   import In, Out
-from amaranth.utils        import exact_log2
+from amaranth.lib.memory   import Memory
+from amaranth.utils        import ceil_log2
 
 from amaranth_future       import fixed
 from amaranth_soc          import wishbone
 
-from luna_soc.gateware.core import blockram
-
 from tiliqua.eurorack_pmod import ASQ
 from tiliqua.cache         import WishboneL2Cache
 
@@ -137,7 +136,9 @@ class DelayLine(wiring.Component):
         """
         max_delay : int
             The maximum delay in samples. This exactly corresponds to the memory
-            required in the backing store. Must be a power of 2.
+            required in the backing store. Need not be a power of 2, so SRAM-backed
+            delay lines can be sized to avoid wasting block RAM, however a power
+            of 2 saves some logic when wrapping read addresses.
         psram_backed : bool, optional
             If True, the delay line is backed by PSRAM. Otherwise, it is backed
             by SRAM.
@@ -163,7 +164,7 @@ class DelayLine(wiring.Component):
             assert addr_width_o is None
 
         self.max_delay = max_delay
-        self.address_width = exact_log2(max_delay)
+        self.address_width = ceil_log2(max_delay)
         self.write_triggers_read = write_triggers_read
         self.psram_backed = psram_backed
 
@@ -242,7 +243,7 @@ class DelayLine(wiring.Component):
             assert fixed_delay is not None
             assert fixed_delay < self.max_delay
         tap = DelayLineTap(parent_bus=self._arbiter.bus, writer_bus=self.internal_writer_bus,
-                           fixed_delay=fixed_delay)
+                           max_delay=self.max_delay, fixed_delay=fixed_delay)
         self.taps.append(tap)
         self._arbiter.add(tap._bus)
         return tap
@@ -286,13 +287,24 @@ class DelayLine(wiring.Component):
             wiring.connect(m, self._cache.slave, wiring.flipped(self.bus))
         else:
             # Local SRAM-backed delay line. No need for adapters or caches.
-            sram_size = self.max_delay * (self._arbiter.bus.data_width //
-                                          self._arbiter.bus.granularity)
-            m.submodules.sram = sram_peripheral = blockram.Peripheral(
-                size=sram_size, data_width=self._arbiter.bus.data_width,
-                granularity=self._arbiter.bus.granularity
-            )
-            wiring.connect(m, self._arbiter.bus, sram_peripheral.bus)
+            # The SRAM is exactly 'max_delay' samples deep (not rounded up to
+            # a power of 2), and acks every access on the following cycle.
+            sram_bus = self._arbiter.bus
+            m.submodules.sram = sram = Memory(
+                shape=sram_bus.data_width, depth=self.max_delay, init=[])
+            sram_wport = sram.write_port(granularity=sram_bus.granularity)
+            sram_rport = sram.read_port(transparent_for=(sram_wport,))
+            m.d.comb += [
+                sram_rport.addr.eq(sram_bus.adr),
+                sram_wport.addr.eq(sram_bus.adr),
+                sram_wport.data.eq(sram_bus.dat_w),
+                sram_bus.dat_r.eq(sram_rport.data),
+            ]
+            m.d.sync += sram_bus.ack.eq(0)
+            with m.If(sram_bus.cyc & sram_bus.stb & ~sram_bus.ack):
+                m.d.sync += sram_bus.ack.eq(1)
+                with m.If(sram_bus.we):
+                    m.d.comb += sram_wport.en.eq(sram_bus.sel)
 
         # bus for sample writes which sits before the arbiter
         bus = self.internal_writer_bus
@@ -361,10 +373,10 @@ class DelayLineTap(wiring.Component):
         Stream of samples read from the delay line, one per request
         on :py:`DelayLineTap.i`.
     """
-    def __init__(self, parent_bus, writer_bus, fixed_delay=None):
+    def __init__(self, parent_bus, writer_bus, max_delay, fixed_delay=None):
 
         self.fixed_delay = fixed_delay
-        self.max_delay   = 2**parent_bus.addr_width
+        self.max_delay   = max_delay
         self.addr_width  = parent_bus.addr_width
         self.writer_bus  = writer_bus
 
@@ -395,7 +407,15 @@ class DelayLineTap(wiring.Component):
                     with m.If(self.i.payload == 0):
                         m.next = 'ZDELAY'
                     with m.Else():
-                        m.d.sync += bus.adr.eq(self._wrpointer - self.i.payload)
+                        if self.max_delay == 2**self.addr_width:
+                            # Address wraps by itself.
+                            m.d.sync += bus.adr.eq(self._wrpointer - self.i.payload)
+                        else:
+                            with m.If(self._wrpointer >= self.i.payload):
+                                m.d.sync += bus.adr.eq(self._wrpointer - self.i.payload)
+                            with m.Else():
+                                m.d.sync += bus.adr.eq(
+                                    self._wrpointer - self.i.payload + self.max_delay)
                         m.next = 'READ'
             with m.State('ZDELAY'):
                 with m.If(self.writer_bus.stb):
@@ -367,31 +367,54 @@ class WaveShaper(wiring.Component):
     stateless so we can precompute a mapping lookup table.
 
     Linear interpolation is used between lut elements.
+
+    Waveshapers evaluating the same function may share a single LUT by passing
+    `shared_lut` (another `WaveShaper` instance, which must own its LUT) instead
+    of `lut_function`. `lut_size` and `continuous` are then taken from
+    `shared_lut`. The LUT memory is instantiated once by the original waveshaper,
+    and this one reads from it through a second read port (i.e. a single
+    dual-port BRAM).
     """
 
     i: In(stream.Signature(ASQ))
     o: Out(stream.Signature(ASQ))
 
-    def __init__(self, lut_function=None, lut_size=512, continuous=False, macp=None):
-        self.lut_size = lut_size
-        self.lut_addr_width = exact_log2(lut_size)
-        self.continuous = continuous
+    def __init__(self, lut_function=None, lut_size=512, continuous=False, macp=None,
+                 shared_lut=None):
         self.macp = macp or mac.MAC.default()
 
-        # build LUT such that we can index into it using 2s
-        # complement and pluck out results with correct sign.
-        self.lut = []
-        for i in range(lut_size):
-            x = None
-            if i < lut_size//2:
-                x = 2*i / lut_size
-            else:
-                x = 2*(i - lut_size) / lut_size
-            fx = lut_function(x)
-            if fx > ASQ.max().as_float() or fx < ASQ.min().as_float():
-                print(f"WARN: WaveShaper `lut_function` generates {fx:.5f} which is outside "
-                      f"[{ASQ.min().as_float():.5f}..{ASQ.max().as_float():.5f}] (will be clamped)")
-            self.lut.append(fixed.Const(fx, shape=ASQ, clamp=True))
+        if shared_lut is not None:
+            # LUT parameters all come from `shared_lut`, which must own its LUT.
+            assert lut_function is None and shared_lut.mem is not None
+            self.lut_size = shared_lut.lut_size
+            self.lut_addr_width = shared_lut.lut_addr_width
+            self.continuous = shared_lut.continuous
+            self.lut = shared_lut.lut
+            # Second read port on the LUT owned by `shared_lut`.
+            self.mem = None
+            self.rport = shared_lut.mem.read_port()
+        else:
+            self.lut_size = lut_size
+            self.lut_addr_width = exact_log2(lut_size)
+            self.continuous = continuous
+
+            # build LUT such that we can index into it using 2s
+            # complement and pluck out results with correct sign.
+            self.lut = []
+            for i in range(lut_size):
+                x = None
+                if i < lut_size//2:
+                    x = 2*i / lut_size
+                else:
+                    x = 2*(i - lut_size) / lut_size
+                fx = lut_function(x)
+                if fx > ASQ.max().as_float() or fx < ASQ.min().as_float():
+                    print(f"WARN: WaveShaper `lut_function` generates {fx:.5f} which is outside "
+                          f"[{ASQ.min().as_float():.5f}..{ASQ.max().as_float():.5f}] (will be clamped)")
+                self.lut.append(fixed.Const(fx, shape=ASQ, clamp=True))
+
+            self.mem = Memory(shape=ASQ, depth=self.lut_size, init=self.lut)
+            self.rport = self.mem.read_port()
 
         super().__init__()
 
@@ -400,9 +423,9 @@ class WaveShaper(wiring.Component):
 
         m.submodules.macp = mp = self.macp
 
-        m.submodules.mem = mem = Memory(
-            shape=ASQ, depth=self.lut_size, init=self.lut)
-        rport = mem.read_port()
+        if self.mem is not None:
+            m.submodules.mem = self.mem
+        rport = self.rport
 
         ltype = fixed.SQ(self.lut_addr_width, ASQ.f_bits-self.lut_addr_width+1)
 
@@ -570,15 +593,21 @@ class DCBlock(wiring.Component):
     """
     Loosely based on:
     https://dspguru.com/dsp/tricks/fixed-point-dc-blocking-filter-with-noise-shaping/
+
+    Multiple channels may be filtered by the same core (:py:`n_channels > 1`),
+    in which case :py:`i` and :py:`o` carry :py:`data.ArrayLayout(sq, n_channels)`
+    and channels are filtered one after the other using the same multiplier.
     """
 
-    def __init__(self, pole=0.999, sq=ASQ, macp=None):
+    def __init__(self, pole=0.999, sq=ASQ, n_channels=1, macp=None):
         self.macp = macp or mac.MAC.default()
         self.pole = pole
         self.sq = sq
+        self.n_channels = n_channels
+        shape = sq if n_channels == 1 else data.ArrayLayout(sq, n_channels)
         super().__init__({
-            "i": In(stream.Signature(sq)),
-            "o": Out(stream.Signature(sq)),
+            "i": In(stream.Signature(shape)),
+            "o": Out(stream.Signature(shape)),
         })
 
     def elaborate(self, platform):
@@ -589,12 +618,29 @@ class DCBlock(wiring.Component):
 
         kA    = fixed.Const((1-self.pole), self.sq)
 
-        x     = Signal(self.sq)
-        y     = Signal(self.sq)
+        n = self.n_channels
+
+        # Per-channel filter state. The channel being filtered is always at
+        # index 0. Once it is done, all state is rotated by one channel, so
+        # after `n_channels` rotations everything is back in channel order.
+        x     = [Signal(self.sq, name=f"x{c}") for c in range(n)]
+        y     = [Signal(self.sq, name=f"y{c}") for c in range(n)]
+        acc   = [Signal(mac.SQRNative, name=f"acc{c}") for c in range(n)]
+        x_in  = [Signal(self.sq, name=f"x_in{c}") for c in range(n)]
+
+        ch    = Signal(range(n))
 
-        acc   = Signal(mac.SQRNative)
+        if n == 1:
+            i_payload = [self.i.payload]
+            o_payload = [self.o.payload]
+        else:
+            i_payload = [self.i.payload[c] for c in range(n)]
+            o_payload = [self.o.payload[c] for c in range(n)]
+
+        def rotate(regs, last):
+            return [regs[c].eq(regs[c+1]) for c in range(n-1)] + [regs[n-1].eq(last)]
 
-        m.d.comb += self.o.payload.eq(acc)
+        m.d.comb += [o_payload[c].eq(acc[c]) for c in range(n)]
 
         with m.FSM() as fsm:
 
@@ -602,20 +648,36 @@ class DCBlock(wiring.Component):
                 m.d.comb += self.i.ready.eq(1)
                 with m.If(self.i.valid):
                    m.d.sync += [
-                       x.eq(self.i.payload),
-                       acc.eq(acc - x),
+                       x[0].eq(i_payload[0]),
+                       acc[0].eq(acc[0] - x[0]),
+                       ch.eq(0),
                    ]
+                   m.d.sync += [x_in[c].eq(i_payload[c]) for c in range(1, n)]
                    m.next = 'MAC0'
 
             with m.State('MAC0'):
-                with mp.Multiply(m, a=y, b=kA):
-                    m.d.sync += acc.eq((acc - mp.z) + x)
-                    m.next = 'WAIT-READY'
+                with mp.Multiply(m, a=y[0], b=kA):
+                    m.d.sync += rotate(acc, (acc[0] - mp.z) + x[0])
+                    m.d.sync += rotate(x, x[0])
+                    m.d.sync += rotate(y, y[0])
+                    m.d.sync += rotate(x_in, x_in[0])
+                    m.d.sync += ch.eq(ch + 1)
+                    with m.If(ch == n - 1):
+                        m.next = 'WAIT-READY'
+                    with m.Else():
+                        m.next = 'NEXT-CHANNEL'
+
+            with m.State('NEXT-CHANNEL'):
+                m.d.sync += [
+                    x[0].eq(x_in[0]),
+                    acc[0].eq(acc[0] - x[0]),
+                ]
+                m.next = 'MAC0'
 
             with m.State('WAIT-READY'):
                 m.d.comb += self.o.valid.eq(1)
                 with m.If(self.o.ready):
-                    m.d.sync += y.eq(acc)
+                    m.d.sync += [y[c].eq(acc[c]) for c in range(n)]
                     m.next = 'WAIT-VALID'
 
         return m
@@ -911,20 +973,25 @@ class FIR(wiring.Component):
     This filter contains some optional optimizations to act as an efficient
     interpolator/decimator. For details, see :py:`stride_i`, :py:`stride_o` below.
 
+    Multiple channels may be filtered by the same core (:py:`n_channels > 1`).
+    In this case, the tap memory and multiplier are shared, and channels are
+    filtered one after the other. At audio rates, the multiplier is idle most
+    of the time anyway.
+
     Members
     -------
     i : :py:`In(stream.Signature(ASQ))`
-        Input stream for sending samples to the filter.
+        Input stream for sending samples to the filter. For :py:`n_channels > 1`,
+        this is :py:`In(stream.Signature(data.ArrayLayout(ASQ, n_channels)))`.
     o : :py:`In(stream.Signature(ASQ))`
         Output stream for getting samples from the filter. There is 1 output
         sample per input sample, presented :py:`filter_order+1` cycles after
         the input sample. For :py:`stride_o > 1`, there is only 1 output
-        sample per :py:`stride_o` input samples.
+        sample per :py:`stride_o` input samples. For :py:`n_channels > 1`,
+        this is :py:`Out(stream.Signature(data.ArrayLayout(ASQ, n_channels)))`,
+        and the latency is multiplied by :py:`n_channels`.
     """
 
-    i: In(stream.Signature(ASQ))
-    o: Out(stream.Signature(ASQ))
-
     def __init__(self,
                  fs:               int,
                  filter_cutoff_hz: int,
@@ -932,7 +999,9 @@ class FIR(wiring.Component):
                  filter_type:      str='lowpass',
                  prescale:         float=1,
                  stride_i:         int=1,
-                 stride_o:         int=1):
+                 stride_o:         int=1,
+                 n_channels:       int=1,
+                 macp=None):
         """
         fs : int
             Sample rate of the filter, used for calculating FIR coefficients.
@@ -964,6 +1033,15 @@ class FIR(wiring.Component):
             :py:`stride_o == M`, only 1 output sample is produced per M input
             samples. This does not reduce LUT/RAM usage, but avoids performing
             MACs to produce samples that will be discarded.
+        n_channels : int
+            Number of independent channels filtered by this core, all with
+            the same taps. Tap storage and the multiplier are shared between
+            all channels, and samples of all channels are packed into a single
+            sample memory.
+        macp : mac.MAC
+            MAC provider used for all MACs. Defaults to a dedicated multiplier. As
+            each MAC only proceeds when :py:`macp` is done, this may be a shared
+            provider like :py:`RingMAC`, at the cost of latency.
         """
         taps = signal.firwin(numtaps=filter_order, cutoff=filter_cutoff_hz,
                              fs=fs, pass_zero=filter_type, window='hamming')
@@ -972,11 +1050,22 @@ class FIR(wiring.Component):
         self.prescale   = prescale
         self.stride_i   = stride_i
         self.stride_o   = stride_o
-        super().__init__()
+        self.n_channels = n_channels
+        self.macp       = macp or mac.MAC.default()
+        if n_channels == 1:
+            sample_layout = ASQ
+        else:
+            sample_layout = data.ArrayLayout(ASQ, n_channels)
+        super().__init__({
+            "i": In(stream.Signature(sample_layout)),
+            "o": Out(stream.Signature(sample_layout)),
+        })
 
     def elaborate(self, platform):
         m = Module()
 
+        m.submodules.macp = mp = self.macp
+
         # Tap and accumulator sizes
 
         self.ctype = fixed.SQ(2, ASQ.f_bits)
@@ -995,10 +1084,25 @@ class FIR(wiring.Component):
 
         taps_rport = taps_mem.read_port()
 
-        # Input sample memory, write and read port
+        # Per-channel views of input and output payloads
+
+        if self.n_channels == 1:
+            i_payload = [self.i.payload]
+            o_payload = [self.o.payload]
+        else:
+            i_payload = [self.i.payload[c] for c in range(self.n_channels)]
+            o_payload = [self.o.payload[c] for c in range(self.n_channels)]
+
+        # Input sample memory, write and read port. For multiple channels, each
+        # channel owns a (power of 2 sized) region of the same memory, such that
+        # it is addressed by {channel, position}. This packs the sample storage of
+        # all channels into as few RAM blocks as possible.
+
+        x_depth = n//self.stride_i
+        x_depth_ch = x_depth if self.n_channels == 1 else 2**ceil_log2(x_depth)
 
         m.submodules.x_mem = x_mem = Memory(
-            shape=self.ctype, depth=n//self.stride_i, init=[]
+            shape=self.ctype, depth=x_depth_ch*self.n_channels, init=[]
         )
 
         x_wport = x_mem.write_port()
@@ -1006,6 +1110,19 @@ class FIR(wiring.Component):
 
         # FIR filter logic
 
+        # Channel currently being filtered
+        ch     = Signal(range(self.n_channels))
+
+        # Channel and position in the sample memory currently being
+        # written / read. The write port is shared by all channels, so only
+        # channel 0 is written as it arrives. The other channels are latched
+        # and each written just before they are filtered.
+        x_wch  = Signal.like(ch)
+        x_rch  = Signal.like(ch)
+        x_wpos = Signal(ceil_log2(x_depth_ch))
+        x_rpos = Signal(ceil_log2(x_depth_ch))
+        x_in   = [Signal(self.ctype) for _ in range(self.n_channels)]
+
         # Number of MACs performed per sample, up to n/self.stride
         macs   = Signal(range(n))
 
@@ -1031,16 +1148,27 @@ class FIR(wiring.Component):
         b  = Signal(self.ctype)
         y  = Signal(self.ctype)
 
+        # Filtered output sample of each channel
+        ys = [Signal(self.ctype) for _ in range(self.n_channels)]
+
         m.d.comb += taps_rport.en.eq(1)
         m.d.comb += taps_rport.addr.eq(ix_tap)
-        m.d.comb += x_wport.data.eq(self.i.payload)
-        m.d.comb += x_rport.addr.eq(ix_rd)
+        m.d.comb += x_rpos.eq(ix_rd)
         m.d.comb += x_rport.en.eq(1)
 
         with m.If(w_pos == (n//self.stride_i - 1)):
-            m.d.comb += x_wport.addr.eq(0)
+            m.d.comb += x_wpos.eq(0)
         with m.Else():
-            m.d.comb += x_wport.addr.eq(w_pos+1)
+            m.d.comb += x_wpos.eq(w_pos+1)
+
+        m.d.comb += [
+            x_wch.eq(ch),
+            x_rch.eq(ch),
+            x_wport.addr.eq(Cat(x_wpos, x_wch)),
+            x_rport.addr.eq(Cat(x_rpos, x_rch)),
+            x_in[0].eq(i_payload[0]),
+            x_wport.data.as_value().eq(Array(x.as_value() for x in x_in)[x_wch]),
+        ]
 
         valid = Signal()
 
@@ -1048,10 +1176,15 @@ class FIR(wiring.Component):
             with m.State('WAIT-VALID'):
                 m.d.comb += self.i.ready.eq(1),
                 with m.If(self.i.valid):
+                    m.d.comb += [
+                        x_wch.eq(0),
+                        x_rch.eq(0),
+                    ]
+                    m.d.sync += [x_in[c].eq(i_payload[c]) for c in range(1, self.n_channels)]
                     with m.If(stride_i_pos == 0):
                         m.d.comb += x_wport.en.eq(1)
                     # Set up first MAC combinatorially
-                    m.d.comb += x_rport.addr.eq(x_wport.addr)
+                    m.d.comb += x_rpos.eq(x_wpos)
                     m.d.comb += taps_rport.addr.eq(stride_i_pos)
                     # Subsequent MACs use ix_rd / ix_tap.
                     m.d.sync += [
@@ -1059,32 +1192,75 @@ class FIR(wiring.Component):
                         ix_tap.eq(stride_i_pos + self.stride_i),
                         y.eq(0),
                         macs.eq(0),
+                        ch.eq(0),
                     ]
 
                     with m.If(stride_o_pos == 0):
                         m.next = "MAC"
                     with m.Else():
-                        m.next = "WAIT-READY"
+                        # No output sample, but other channels must still be stored.
+                        m.next = "STORE" if self.n_channels > 1 else "WAIT-READY"
 
             with m.State("MAC"):
                 m.d.comb += [
                     a.eq(x_rport.data),
                     b.eq(taps_rport.data),
+                    # Hold the sample and tap reads until the MAC is done.
+                    x_rport.en.eq(0),
+                    taps_rport.en.eq(0),
                 ]
-                m.d.sync += [
-                    y.eq(y + (a * b)),
-                    macs.eq(macs+1),
-                ]
-                # next tap read position
-                m.d.sync += ix_tap.eq(ix_tap + self.stride_i),
-                # next sample read position
-                with m.If(ix_rd == 0):
-                    m.d.sync += ix_rd.eq((n//self.stride_i - 1))
-                with m.Else():
-                    m.d.sync += ix_rd.eq(ix_rd - 1),
-                # done?
-                with m.If(macs == (n//self.stride_i - 1)):
-                    m.next = "WAIT-READY"
+                with mp.Multiply(m, a=a, b=b):
+                    m.d.comb += [
+                        x_rport.en.eq(1),
+                        taps_rport.en.eq(1),
+                    ]
+                    m.d.sync += [
+                        y.eq(y + mp.z),
+                        macs.eq(macs+1),
+                    ]
+                    # next tap read position
+                    m.d.sync += ix_tap.eq(ix_tap + self.stride_i),
+                    # next sample read position
+                    with m.If(ix_rd == 0):
+                        m.d.sync += ix_rd.eq((n//self.stride_i - 1))
+                    with m.Else():
+                        m.d.sync += ix_rd.eq(ix_rd - 1),
+                    # done with this channel?
+                    with m.If(macs == (n//self.stride_i - 1)):
+                        with m.Switch(ch):
+                            for c in range(self.n_channels):
+                                with m.Case(c):
+                                    m.d.sync += ys[c].eq(y + mp.z)
+                        with m.If(ch == (self.n_channels - 1)):
+                            m.next = "WAIT-READY"
+                        with m.Else():
+                            # Store the next channel's sample and set up its first
+                            # MAC combinatorially, exactly as for the first channel
+                            # in 'WAIT-VALID'.
+                            m.d.comb += [
+                                x_wch.eq(ch + 1),
+                                x_rch.eq(ch + 1),
+                                x_wport.en.eq(stride_i_pos == 0),
+                                x_rpos.eq(x_wpos),
+                                taps_rport.addr.eq(stride_i_pos),
+                            ]
+                            m.d.sync += [
+                                ix_rd.eq(w_pos),
+                                ix_tap.eq(stride_i_pos + self.stride_i),
+                                y.eq(0),
+                                macs.eq(0),
+                                ch.eq(ch + 1),
+                            ]
+
+            if self.n_channels > 1:
+                with m.State("STORE"):
+                    m.d.comb += [
+                        x_wch.eq(ch + 1),
+                        x_wport.en.eq(stride_i_pos == 0),
+                    ]
+                    m.d.sync += ch.eq(ch + 1)
+                    with m.If(ch == (self.n_channels - 2)):
+                        m.next = "WAIT-READY"
 
             with m.State('WAIT-READY'):
 
@@ -1092,10 +1268,8 @@ class FIR(wiring.Component):
                 # assert 'valid', simply update the stride counters and jump
                 # straight back to 'WAIT-VALID'.
 
-                m.d.comb += [
-                    self.o.valid.eq(stride_o_pos == 0),
-                    self.o.payload.eq(y)
-                ]
+                m.d.comb += self.o.valid.eq(stride_o_pos == 0)
+                m.d.comb += [o_payload[c].eq(ys[c]) for c in range(self.n_channels)]
 
                 with m.If(self.o.ready | (stride_o_pos != 0)):
 
@@ -1133,24 +1307,28 @@ class Resample(wiring.Component):
     for large upsampling/interpolating ratios, and is what makes this a polyphase
     resampler - time complexity per output sample proportional to O(fir_order/N).
 
+    For :py:`n_channels > 1`, all channels are resampled by the same underlying
+    FIR core, which is time-multiplexed between channels (see :py:`FIR`).
+
     Members
     -------
     i : :py:`In(stream.Signature(ASQ))`
         Input stream for sending samples to the resampler at sample rate :py:`fs_in`.
+        For :py:`n_channels > 1`, the payload is :py:`data.ArrayLayout(ASQ, n_channels)`.
     o : :py:`In(stream.Signature(ASQ))`
         Output stream for getting samples from the resampler. Samples are produced
         at a rate determined by :py:`fs_in * (n_up / m_down)`.
+        For :py:`n_channels > 1`, the payload is :py:`data.ArrayLayout(ASQ, n_channels)`.
     """
 
-    i: In(stream.Signature(ASQ))
-    o: Out(stream.Signature(ASQ))
-
     def __init__(self,
                  fs_in:      int,
                  n_up:       int,
                  m_down:     int,
                  bw:         float=0.4,
-                 order_mult: int=5):
+                 order_mult: int=5,
+                 n_channels: int=1,
+                 macp=None):
         """
         fs_in : int
             Expected sample rate of incoming samples, used for calculating filter coefficients.
@@ -1166,6 +1344,10 @@ class Resample(wiring.Component):
             Filter order multiplier, determines number of taps in underlying FIR filter. The
             underlying tap count is determined as :py:`order_factor*max(self.n_up, self.m_down)`,
             rounded up to the next multiple of :py:`n_up` (required for even zero padding).
+        n_channels : int
+            Number of channels resampled by this core, sharing a single FIR core.
+        macp : mac.MAC
+            MAC provider of the underlying FIR core (see :py:`FIR`).
         """
 
         gcd = math.gcd(n_up, m_down)
@@ -1178,6 +1360,7 @@ class Resample(wiring.Component):
         self.n_up   = n_up
         self.m_down = m_down
         self.bw     = bw
+        self.n_channels = n_channels
 
         filter_order = order_mult*max(self.n_up, self.m_down)
         if filter_order % self.n_up != 0:
@@ -1193,10 +1376,19 @@ class Resample(wiring.Component):
             filter_order=filter_order,
             prescale=self.n_up,
             stride_i=self.n_up,
-            stride_o=self.m_down
+            stride_o=self.m_down,
+            n_channels=n_channels,
+            macp=macp,
         )
 
-        super().__init__()
+        if n_channels == 1:
+            sample_layout = ASQ
+        else:
+            sample_layout = data.ArrayLayout(ASQ, n_channels)
+        super().__init__({
+            "i": In(stream.Signature(sample_layout)),
+            "o": Out(stream.Signature(sample_layout)),
+        })
 
     def elaborate(self, platform):
 
@@ -13,6 +13,8 @@ from amaranth.lib            import wiring, data, stream
 from amaranth.lib.wiring     import In, Out
 from amaranth.lib.fifo       import SyncFIFOBuffered
 from amaranth.lib.cdc        import FFSynchronizer
+from amaranth.lib.memory     import Memory
+from amaranth.utils          import exact_log2
 
 from amaranth_future         import fixed
 
@@ -22,6 +24,116 @@ from tiliqua.eurorack_pmod   import ASQ
 
 from amaranth_soc            import wishbone, csr
 
+def _mul_row(y, row_words):
+    """
+    Multiply `y` by the framebuffer row length `row_words`. If the row length
+    is a constant, emit a sum of shifted `y` (a single shift for a power of 2)
+    rather than a general purpose multiplier.
+    """
+    if not isinstance(row_words, int):
+        return y*row_words
+    if row_words == 0:
+        return C(0)
+    terms = [y << n for n in range(row_words.bit_length()) if (row_words >> n) & 1]
+    return sum(terms[1:], terms[0])
+
+class TileBinner(wiring.Component):
+
+    """
+    Small reordering queue for pixel records (each with an `adr` field).
+
+    Records are emitted grouped by framebuffer tile (`adr` with the lower
+    `tile_bits` bits stripped), so that bus transactions stay close to each
+    other in memory. The oldest record in the current tile is always emitted
+    first, so records landing on the same pixel are never reordered.
+
+    If no queued record lands in the current tile, or the oldest record has
+    been skipped over `depth` times, we switch to the tile of the oldest record.
+
+    The output is registered (one extra record may be held there).
+    """
+
+    def __init__(self, *, layout, depth=8, tile_bits=6):
+        self.depth = depth
+        self.tile_bits = tile_bits
+        super().__init__({
+            "i": In(stream.Signature(layout)),
+            "o": Out(stream.Signature(layout)),
+        })
+
+    def elaborate(self, platform) -> Module:
+        m = Module()
+
+        # Entries [0, level) are occupied, oldest first.
+        entries = [Signal(self.i.payload.shape(), name=f"entry{n}") for n in range(self.depth)]
+        level   = Signal(range(self.depth+1))
+
+        def tile_of(entry):
+            return entry.adr[self.tile_bits:]
+
+        tile    = Signal(len(tile_of(entries[0])))
+        skipped = Signal(range(self.depth+1))
+
+        # Oldest entry in the current tile
+        match = Signal(self.depth)
+        sel   = Signal(range(self.depth))
+        m.d.comb += [match[n].eq((n < level) & (tile_of(entries[n]) == tile))
+                     for n in range(self.depth)]
+        for n in reversed(range(self.depth)):
+            with m.If(match[n]):
+                m.d.comb += sel.eq(n)
+
+        # The selected entry is moved into a registered output stage, so the
+        # tile match and select logic never drives the consumer directly.
+        # `pop` takes an entry out of the queue whenever the output stage is
+        # empty or being emptied in the same cycle.
+        push = Signal()
+        pop  = Signal()
+        m.d.comb += [
+            self.i.ready.eq(level != self.depth),
+            push.eq(self.i.valid & self.i.ready),
+            pop.eq(match.any() & (~self.o.valid | self.o.ready)),
+        ]
+        with m.If(pop):
+            m.d.sync += self.o.valid.eq(1)
+            for n in range(self.depth):
+                with m.If(sel == n):
+                    m.d.sync += self.o.payload.eq(entries[n])
+        with m.Elif(self.o.ready):
+            m.d.sync += self.o.valid.eq(0)
+
+        # Remove the emitted entry by shifting younger entries down, and
+        # append new entries after the youngest one.
+        for n in range(self.depth):
+            if n + 1 < self.depth:
+                with m.If(pop & (n >= sel)):
+                    m.d.sync += entries[n].eq(entries[n+1])
+            with m.If(push & (n == (level - pop))):
+                m.d.sync += entries[n].eq(self.i.payload)
+        m.d.sync += level.eq(level + push - pop)
+
+        # Tile switching
+        with m.If(pop):
+            with m.If(sel == 0):
+                m.d.sync += skipped.eq(0)
+            with m.Elif(skipped == self.depth - 1):
+                # Oldest entry (still entry 0 after this pop) is starving.
+                m.d.sync += [
+                    tile.eq(tile_of(entries[0])),
+                    skipped.eq(0),
+                ]
+            with m.Else():
+                m.d.sync += skipped.eq(skipped + 1)
+        with m.Elif((level != 0) & ~match.any() & (~self.o.valid | self.o.ready)):
+            # Only switch once the output stage is free, as the record it
+            # holds may be followed by more records in the current tile.
+            m.d.sync += [
+                tile.eq(tile_of(entries[0])),
+                skipped.eq(0),
+            ]
+
+        return m
+
 class Stroke(wiring.Component):
 
     """
@@ -30,7 +142,26 @@ class Stroke(wiring.Component):
     where each pixel is going to land beforehand. This is the most expensive use of
     PSRAM time in this project as we spend ages waiting on memory latency.
 
-    TODO: can we somehow cache bursts of pixels here?
+    To cut down on bus traffic, words are merged in a tiny direct-mapped write-back
+    cache of `cachesize_words` words local to this core. Upsampled points are
+    spatially correlated, so consecutive points usually land in words that are
+    already cached and no bus transaction is needed at all. Cached words are
+    written back (and invalidated) on eviction, or whenever there are no points
+    waiting to be drawn, so they never stay stale for long compared to the
+    persistance emulation that is also modifying the framebuffer.
+
+    Only pixels drawn by this core are written back (by byte lane, using `sel`),
+    so several cores sharing a framebuffer (e.g. one per scope channel) do not
+    overwrite each other's pixels in the same word. However, if another core
+    modifies a pixel that is also cached here, one of the two updates of that
+    pixel is lost. This trade-off is the same as with the persistance emulation,
+    just over a longer window than a single read/write pair.
+
+    Latching points and merging pixels into the framebuffer are pipelined. Pixels
+    to draw are queued in a small queue (`fifo_depth`), such that the next point can
+    be latched while the memory latency of the previous one is being waited on.
+    Queued pixels are merged grouped by framebuffer tile (see :py:`TileBinner`),
+    to keep bus transactions close together in memory.
 
     Each pixel must be read before we write it for 2 reasons:
     - We have 4 pixels per word, so we can't just write 1 pixel as it would erase the
@@ -45,11 +176,17 @@ class Stroke(wiring.Component):
 
 
     def __init__(self, *, fb: DMAFramebuffer, fs=192000, n_upsample=None,
-                 default_hue=10, default_x=0, default_y=0):
+                 default_hue=10, default_x=0, default_y=0, cachesize_words=8,
+                 fifo_depth=8, tile_bits=6):
 
         self.fb = fb
         self.fs = fs
         self.n_upsample = n_upsample
+        # Local cache must be a power of 2 and have at least 2 lines.
+        assert cachesize_words > 1
+        self.cachesize_words = cachesize_words
+        self.fifo_depth = fifo_depth
+        self.tile_bits = tile_bits
 
         self.hue       = Signal(4, init=default_hue);
         self.intensity = Signal(4, init=8);
@@ -80,8 +217,13 @@ class Stroke(wiring.Component):
 
         bus = self.bus
 
-        fb_len_words = (self.fb.timings.active_pixels * self.fb.bytes_per_pixel) // 4
-        fb_hwords = ((self.fb.timings.h_active*self.fb.bytes_per_pixel)//4)
+        # With a fixed modeline, the framebuffer dimensions are elaboration-time
+        # constants, so the address math below does not need a multiplier.
+        timings = self.fb.fixed_modeline if self.fb.fixed_modeline is not None else self.fb.timings
+
+        fb_len_words = (timings.active_pixels * self.fb.bytes_per_pixel) // 4
+        fb_hwords = ((timings.h_active*self.fb.bytes_per_pixel)//4)
+        v_active = timings.v_active
 
         # Define pixel structure: 4-bit color + 4-bit intensity
         pixel_layout = data.StructLayout({
@@ -93,23 +235,30 @@ class Stroke(wiring.Component):
 
         if self.n_upsample is not None and self.n_upsample != 1:
             # If interpolation is enabled, insert an FIR upsampling stage.
+            # x/y share a single (time-multiplexed) FIR resampler. Intensity
+            # and color are simply duplicated.
             m.submodules.split = split = dsp.Split(n_channels=4)
             m.submodules.merge = merge = dsp.Merge(n_channels=4)
 
-            m.submodules.resample0 = resample0 = dsp.Resample(fs_in=self.fs, n_up=self.n_upsample, m_down=1)
-            m.submodules.resample1 = resample1 = dsp.Resample(fs_in=self.fs, n_up=self.n_upsample, m_down=1)
+            m.submodules.resample_merge = resample_merge = dsp.Merge(n_channels=2)
+            m.submodules.resample_xy = resample_xy = dsp.Resample(
+                    fs_in=self.fs, n_up=self.n_upsample, m_down=1, n_channels=2)
+            m.submodules.resample_split = resample_split = dsp.Split(n_channels=2)
             m.submodules.resample2 = resample2 = dsp.Duplicate(n=self.n_upsample)
             m.submodules.resample3 = resample3 = dsp.Duplicate(n=self.n_upsample)
 
             wiring.connect(m, wiring.flipped(self.i), split.i)
 
-            wiring.connect(m, split.o[0], resample0.i)
-            wiring.connect(m, split.o[1], resample1.i)
+            wiring.connect(m, split.o[0], resample_merge.i[0])
+            wiring.connect(m, split.o[1], resample_merge.i[1])
             wiring.connect(m, split.o[2], resample2.i)
             wiring.connect(m, split.o[3], resample3.i)
 
-            wiring.connect(m, resample0.o, merge.i[0])
-            wiring.connect(m, resample1.o, merge.i[1])
+            wiring.connect(m, resample_merge.o, resample_xy.i)
+            wiring.connect(m, resample_xy.o, resample_split.i)
+
+            wiring.connect(m, resample_split.o[0], merge.i[0])
+            wiring.connect(m, resample_split.o[1], merge.i[1])
             wiring.connect(m, resample2.o, merge.i[2])
             wiring.connect(m, resample3.o, merge.i[3])
 
@@ -128,130 +277,319 @@ class Stroke(wiring.Component):
         pixel_index = Signal(unsigned(2))  # Which of the 4 pixels in the word
         pixel_offs = Signal(unsigned(32))
 
-        # last sample
-        sample_x = Signal(signed(16))
+        # last sample, already remapped for (optional) 90deg rotation
+        # as it is latched, such that the address math below is the
+        # same for both orientations.
+        sample_x = Signal(signed(17))
         sample_y = Signal(signed(16))
         sample_p = Signal(signed(16)) # intensity modulation TODO
         sample_c = Signal(signed(16)) # color modulation DONE
 
-        m.d.comb += pixel_offs.eq(y_offs*fb_hwords + x_offs),
-        with m.If(self.rotate_left):
-            # remap pixel offset for 90deg rotation
-            m.d.comb += [
-                pixel_index.eq((-sample_y)[0:2]),
-                x_offs.eq((fb_hwords//2) + ((-sample_y)>>2)),
-                y_offs.eq(sample_x + (self.fb.timings.v_active>>1)),
-            ]
+        # incoming sample position, before rotation
+        point_x = Signal(signed(16))
+        point_y = Signal(signed(16))
+
+        m.d.comb += [
+            point_x.eq((self.point_stream.payload[0].as_value()>>self.scale_x) + self.x_offset),
+            # invert point_y for positive scope -> up
+            point_y.eq((-self.point_stream.payload[1].as_value()>>self.scale_y) + self.y_offset),
+        ]
+
+        m.d.comb += [
+            pixel_offs.eq(_mul_row(y_offs, fb_hwords) + x_offs),
+            pixel_index.eq(sample_x[0:2]),
+            x_offs.eq((fb_hwords//2) + (sample_x>>2)),
+            y_offs.eq(sample_y + (v_active>>1)),
+        ]
+
+        # Pixels to draw are computed from the latched sample (stage A) and
+        # queued, so they can be merged into the framebuffer (stage B) while
+        # the next sample is being latched.
+        pixel_record_layout = data.StructLayout({
+            "adr": unsigned(len(bus.adr)),
+            "index": unsigned(2),
+            "color": unsigned(4),
+            "intensity": unsigned(4),
+        })
+        m.submodules.pixel_queue = pixel_queue = TileBinner(
+            layout=pixel_record_layout, depth=self.fifo_depth, tile_bits=self.tile_bits)
+        pixel_in  = Signal(pixel_record_layout)
+        pixel_out = Signal(pixel_record_layout)
+
+        # Consecutive upsampled points often land on the same pixel. Such
+        # points are accumulated into a single pending record, which is
+        # only queued once a point lands on a different pixel (or there
+        # are no more points to latch).
+        pending       = Signal(pixel_record_layout)
+        pending_valid = Signal()
+        pending_match = Signal()
+        pending_sum   = Signal(unsigned(5))
+
+        m.d.comb += [
+            pixel_queue.i.payload.eq(pending),
+            pixel_out.eq(pixel_queue.o.payload),
+            pending_match.eq(pending_valid &
+                             (pending.adr == pixel_in.adr) &
+                             (pending.index == pixel_in.index)),
+            pending_sum.eq(pending.intensity + pixel_in.intensity),
+        ]
+
+        # Calculate new pixel values (stage A)
+        sample_intensity = Signal(unsigned(4))
+
+        # Calculate sample intensity with bounds checking
+        with m.If((sample_p + self.intensity > 0) & (sample_p + self.intensity <= 0xf)):
+            m.d.comb += sample_intensity.eq(sample_p + self.intensity)
         with m.Else():
-            m.d.comb += [
-                pixel_index.eq(sample_x[0:2]),
-                x_offs.eq((fb_hwords//2) + (sample_x>>2)),
-                y_offs.eq(sample_y + (self.fb.timings.v_active>>1)),
-            ]
-
-        with m.FSM() as fsm:
+            m.d.comb += sample_intensity.eq(0)
+
+        m.d.comb += [
+            pixel_in.adr.eq(self.fb.fb_base + pixel_offs),
+            pixel_in.index.eq(pixel_index),
+            # Calculate new color (sample color + base hue)
+            pixel_in.color.eq(sample_c + self.hue),
+            pixel_in.intensity.eq(sample_intensity),
+        ]
+
+        # Next sample (rotated), and whether it lands on the screen at all.
+        # Points outside the screen boundaries are dropped as they are
+        # latched, so they never occupy stage A.
+        next_x = Signal(signed(17))
+        next_y = Signal(signed(16))
+        next_x_offs = Signal(unsigned(16))
+        next_y_offs = Signal(unsigned(16))
+        next_in_bounds = Signal()
+        m.d.comb += [
+            next_x.eq(Mux(self.rotate_left, -point_y, point_x)),
+            next_y.eq(Mux(self.rotate_left, point_x, point_y)),
+            next_x_offs.eq((fb_hwords//2) + (next_x>>2)),
+            next_y_offs.eq(next_y + (v_active>>1)),
+            next_in_bounds.eq((next_x_offs < fb_hwords) & (next_y_offs < v_active)),
+        ]
+
+        # Set while the latched sample is waiting to be merged into `pending`.
+        sample_valid = Signal()
+
+        # Set when the latched sample is done with (stage A).
+        point_done = Signal()
+
+        with m.FSM(name="latch_fsm"):
 
             with m.State('OFF'):
                 with m.If(self.enable):
-                    m.next = 'LATCH0'
+                    m.next = 'LATCH'
 
-            with m.State('LATCH0'):
+            with m.State('LATCH'):
 
-                m.d.comb += self.point_stream.ready.eq(1)
-                # Fired on every audio sample fs_strobe
-                with m.If(self.point_stream.valid):
-                    m.d.sync += [
-                        sample_x.eq((self.point_stream.payload[0].as_value()>>self.scale_x) + self.x_offset),
-                        # invert sample_y for positive scope -> up
-                        sample_y.eq((-self.point_stream.payload[1].as_value()>>self.scale_y) + self.y_offset),
-                        sample_p.eq(Mux(self.scale_p != 0xf, self.point_stream.payload[2].as_value()>>self.scale_p, 0)),
-                        sample_c.eq(Mux(self.scale_c != 0xf, self.point_stream.payload[3].as_value()>>self.scale_c, 0)),
-                    ]
-                    m.next = 'LATCH1'
+                with m.If(sample_valid):
+                    with m.If(pending_match):
+                        # Same pixel as the pending one, accumulate (with saturation)
+                        m.d.comb += point_done.eq(1)
+                        m.d.sync += [
+                            pending.color.eq(pixel_in.color),
+                            pending.intensity.eq(Mux(pending_sum >= 0xF, 0xF, pending_sum)),
+                        ]
+                    with m.Elif(~pending_valid | pixel_queue.i.ready):
+                        # Queue the pending pixel (if any), this one becomes pending.
+                        m.d.comb += point_done.eq(1)
+                        m.d.comb += pixel_queue.i.valid.eq(pending_valid)
+                        m.d.sync += [
+                            pending.eq(pixel_in),
+                            pending_valid.eq(1),
+                        ]
 
-            with m.State('LATCH1'):
+                # Latch the next point from the upsampled stream (if there is
+                # one) in the same cycle the current one is done with.
+                with m.If(~sample_valid | point_done):
+                    m.d.comb += self.point_stream.ready.eq(1)
+                    m.d.sync += sample_valid.eq(self.point_stream.valid & next_in_bounds)
+                    with m.If(self.point_stream.valid):
+                        m.d.sync += [
+                            sample_x.eq(next_x),
+                            sample_y.eq(next_y),
+                            sample_p.eq(Mux(self.scale_p != 0xf, self.point_stream.payload[2].as_value()>>self.scale_p, 0)),
+                            sample_c.eq(Mux(self.scale_c != 0xf, self.point_stream.payload[3].as_value()>>self.scale_c, 0)),
+                        ]
+                    with m.Elif(~sample_valid & pending_valid & pixel_queue.i.ready):
+                        # No more points (for now), queue the pending pixel.
+                        m.d.comb += pixel_queue.i.valid.eq(1)
+                        m.d.sync += pending_valid.eq(0)
 
-                with m.If((x_offs < fb_hwords) & (y_offs < self.fb.timings.v_active)):
-                    m.d.sync += [
-                        bus.sel.eq(0xf),
-                        bus.adr.eq(self.fb.fb_base + pixel_offs),
-                    ]
-                    m.next = 'READ'
+        # Merge pixels into the framebuffer (stage B)
+        current_intensity = Signal(unsigned(4))
+        new_intensity = Signal(unsigned(4))
+
+        # Extract current pixel data
+        m.d.comb += current_intensity.eq(pixels_read[pixel_out.index].intensity)
+
+        # Calculate new intensity (add with saturation)
+        with m.If(current_intensity + pixel_out.intensity >= 0xF):
+            m.d.comb += new_intensity.eq(0xF)
+        with m.Else():
+            m.d.comb += new_intensity.eq(current_intensity + pixel_out.intensity)
+
+        # Copy new pixel from read data to write data
+        for i in range(pixels_per_word):
+            with m.If(pixel_out.index == i):
+                m.d.comb += [
+                    pixels_write[i].color.eq(pixel_out.color),
+                    pixels_write[i].intensity.eq(new_intensity),
+                ]
+            # Preserve other pixels unchanged
+            with m.Else():
+                m.d.comb += [
+                    pixels_write[i].color.eq(pixels_read[i].color),
+                    pixels_write[i].intensity.eq(pixels_read[i].intensity),
+                ]
+
+        # Local word cache. Slice the word address into 2 fields:
+        # (MSB) adr_tag .. adr_line (LSB)
+        linebits = exact_log2(self.cachesize_words)
+        word_adr = pixel_out.adr
+        adr_line = word_adr.bit_select(0, linebits)
+        adr_tag  = word_adr.bit_select(linebits, len(word_adr) - linebits)
+
+        # Line to read out of the cache (usually adr_line, except when flushing)
+        rd_line    = Signal(linebits)
+        flush_line = Signal(linebits)
+        next_flush_line = Signal(linebits)
+        m.d.comb += next_flush_line.eq(flush_line + 1)
+
+        # Per-pixel dirty bits of each line. A line is valid if any of its pixels
+        # is dirty, as lines are only ever filled in order to merge a pixel into
+        # them. Write-backs only enable the byte lanes of dirty pixels. Dirty bits
+        # are kept outside of the tag memory so they are cleared by the
+        # ResetInserter below.
+        line_dirty = Signal(self.cachesize_words*pixels_per_word)
+        rd_dirty   = Signal(pixels_per_word)
+        rd_valid   = Signal()
+
+        def dirty(line):
+            return line_dirty.word_select(line, pixels_per_word)
+
+        m.submodules.data_mem = data_mem = Memory(
+            shape=unsigned(bus.data_width), depth=self.cachesize_words, init=[])
+        data_wport = data_mem.write_port()
+        data_rport = data_mem.read_port(domain='comb')
+
+        m.submodules.tag_mem = tag_mem = Memory(
+            shape=unsigned(len(adr_tag)), depth=self.cachesize_words, init=[])
+        tag_wport = tag_mem.write_port()
+        tag_rport = tag_mem.read_port(domain='comb')
+
+        m.d.comb += [
+            rd_line.eq(adr_line),
+            rd_dirty.eq(dirty(rd_line)),
+            rd_valid.eq(rd_dirty.any()),
+            data_rport.addr.eq(rd_line),
+            tag_rport.addr.eq(rd_line),
+            data_wport.addr.eq(adr_line),
+            data_wport.data.eq(pixels_write.as_value()),
+            tag_wport.addr.eq(adr_line),
+            tag_wport.data.eq(adr_tag),
+            bus.sel.eq(0xf),
+            # Evictions and flushes write back (the dirty pixels of) the line
+            # we are reading out.
+            bus.dat_w.eq(data_rport.data),
+        ]
+
+        with m.FSM(name="merge_fsm"):
+
+            with m.State('LOOKUP'):
+
+                m.d.comb += pixels_read.as_value().eq(data_rport.data)
+
+                with m.If(pixel_queue.o.valid):
+                    with m.If(rd_valid & (tag_rport.data == adr_tag)):
+                        # Hit: merge the new pixel into the cached word.
+                        m.d.comb += [
+                            data_wport.en.eq(1),
+                            pixel_queue.o.ready.eq(1),
+                        ]
+                        m.d.sync += dirty(adr_line).eq(rd_dirty | (1 << pixel_out.index))
+                    with m.Elif(pixel_out.intensity == 0xF):
+                        # Miss, but the pixel saturates no matter what is in memory.
+                        # Skip the refill and write only this pixel's byte lane.
+                        m.next = 'WRITE-BYTE'
+                    with m.Elif(rd_valid):
+                        # Miss on a dirty line: write it back before refilling.
+                        m.next = 'EVICT'
+                    with m.Else():
+                        m.next = 'FILL'
+                with m.Elif(dirty(flush_line).any()):
+                    # Nothing to draw, write back a dirty line.
+                    m.next = 'FLUSH'
                 with m.Else():
-                    # don't draw outside the screen boundaries
-                    m.next = 'LATCH0'
+                    m.d.sync += flush_line.eq(next_flush_line)
 
-            with m.State('READ'):
+            with m.State('EVICT'):
 
                 m.d.comb += [
                     bus.stb.eq(1),
                     bus.cyc.eq(1),
-                    bus.we.eq(0),
+                    bus.we.eq(1),
+                    bus.adr.eq(Cat(rd_line, tag_rport.data)),
+                    bus.sel.eq(rd_dirty),
                 ]
 
                 with m.If(bus.stb & bus.ack):
-                    m.d.sync += pixels_read.as_value().eq(bus.dat_r)
-                    m.next = 'WAIT'
+                    m.next = 'FILL'
 
-            with m.State('WAIT'):
-                m.next = 'WAIT2'
+            with m.State('FILL'):
 
-            with m.State('WAIT2'):
-                m.next = 'WAIT3'
+                m.d.comb += [
+                    bus.stb.eq(1),
+                    bus.cyc.eq(1),
+                    bus.we.eq(0),
+                    bus.adr.eq(word_adr),
+                    pixels_read.as_value().eq(bus.dat_r),
+                ]
 
-            with m.State('WAIT3'):
-                m.next = 'WRITE'
+                with m.If(bus.stb & bus.ack):
+                    # Merge the new pixel on the way into the cache.
+                    m.d.comb += [
+                        data_wport.en.eq(1),
+                        tag_wport.en.eq(1),
+                        pixel_queue.o.ready.eq(1),
+                    ]
+                    m.d.sync += dirty(adr_line).eq(1 << pixel_out.index)
+                    m.next = 'LOOKUP'
 
-            with m.State('WRITE'):
+            with m.State('WRITE-BYTE'):
 
                 m.d.comb += [
                     bus.stb.eq(1),
                     bus.cyc.eq(1),
                     bus.we.eq(1),
+                    bus.adr.eq(word_adr),
+                    bus.sel.eq(1 << pixel_out.index),
+                    bus.dat_w.eq(pixels_write.as_value()),
                 ]
 
-                # Calculate new pixel values
-                new_color = Signal(unsigned(4))
-                sample_intensity = Signal(unsigned(4))
-                current_intensity = Signal(unsigned(4))
-                new_intensity = Signal(unsigned(4))
-
-                # Extract current pixel data
-                m.d.comb += current_intensity.eq(pixels_read[pixel_index].intensity)
-
-                # Calculate new color (sample color + base hue)
-                m.d.comb += new_color.eq(sample_c + self.hue)
-
-                # Calculate sample intensity with bounds checking
-                with m.If((sample_p + self.intensity > 0) & (sample_p + self.intensity <= 0xf)):
-                    m.d.sync += sample_intensity.eq(sample_p + self.intensity)
-                with m.Else():
-                    m.d.sync += sample_intensity.eq(0)
-
-                # Calculate new intensity (add with saturation)
-                with m.If(current_intensity + sample_intensity >= 0xF):
-                    m.d.comb += new_intensity.eq(0xF)
-                with m.Else():
-                    m.d.comb += new_intensity.eq(current_intensity + sample_intensity)
+                with m.If(bus.stb & bus.ack):
+                    m.d.comb += pixel_queue.o.ready.eq(1)
+                    m.next = 'LOOKUP'
 
-                # Copy new pixel from read data to write data
-                for i in range(pixels_per_word):
-                    with m.If(pixel_index == i):
-                        m.d.comb += [
-                            pixels_write[i].color.eq(new_color),
-                            pixels_write[i].intensity.eq(new_intensity),
-                        ]
-                    # Preserve other pixels unchanged
-                    with m.Else():
-                        m.d.comb += [
-                            pixels_write[i].color.eq(pixels_read[i].color),
-                            pixels_write[i].intensity.eq(pixels_read[i].intensity),
-                        ]
+            with m.State('FLUSH'):
 
-                # Write pixel data back to bus
-                m.d.comb += bus.dat_w.eq(pixels_write.as_value())
+                m.d.comb += [
+                    rd_line.eq(flush_line),
+                    bus.stb.eq(1),
+                    bus.cyc.eq(1),
+                    bus.we.eq(1),
+                    bus.adr.eq(Cat(rd_line, tag_rport.data)),
+                    bus.sel.eq(rd_dirty),
+                ]
 
                 with m.If(bus.stb & bus.ack):
-                    m.next = 'LATCH0'
+                    m.d.sync += [
+                        dirty(flush_line).eq(0),
+                        flush_line.eq(next_flush_line),
+                    ]
+                    # If there is nothing to draw, keep writing back dirty lines
+                    # (often sequential addresses) as a single classic block
+                    # cycle, without giving up the bus in between.
+                    with m.If(pixel_queue.o.valid | ~dirty(next_flush_line).any()):
+                        m.next = 'LOOKUP'
 
         return ResetInserter({'sync': ~self.fb.enable})(m)
@@ -667,13 +667,15 @@ class SRAMDiffuser(wiring.Component):
     def __init__(self):
         super().__init__()
 
-        # 4 delay lines, backed by 4 independent SRAM banks.
+        # 4 delay lines, backed by 4 independent SRAM banks. Each is sized
+        # to the next multiple of 1024 samples (1 ECP5 block RAM) above the
+        # default delay.Diffuser tap delays, rather than the next power of 2.
 
         self.delay_lines = [
             DelayLine(max_delay=2048),
-            DelayLine(max_delay=4096),
-            DelayLine(max_delay=8192),
-            DelayLine(max_delay=8192),
+            DelayLine(max_delay=3072),
+            DelayLine(max_delay=5120),
+            DelayLine(max_delay=7168),
         ]
 
         self.diffuser = delay.Diffuser(self.delay_lines)
@@ -54,13 +54,15 @@ class Diffuser(wiring.Component):
     def __init__(self):
         super().__init__()
 
-        # 4 delay lines, backed by 4 independent SRAM banks.
+        # 4 delay lines, backed by 4 independent SRAM banks. Each is sized
+        # to the next multiple of 1024 samples (1 ECP5 block RAM) above the
+        # default delay.Diffuser tap delays, rather than the next power of 2.
 
         self.delay_lines = [
             DelayLine(max_delay=2048),
-            DelayLine(max_delay=4096),
-            DelayLine(max_delay=8192),
-            DelayLine(max_delay=8192),
+            DelayLine(max_delay=3072),
+            DelayLine(max_delay=5120),
+            DelayLine(max_delay=7168),
         ]
 
         self.diffuser = delay.Diffuser(self.delay_lines)
@@ -106,7 +108,8 @@ class PolySynth(wiring.Component):
         # 1 oscillator and filter per oscillator
         ncos = [dsp.SawNCO(shift=0) for _ in range(n_voices)]
 
-        # All SVFs share the same multiplier tile through a RingMAC.
+        # All SVFs (and the output DC block and waveshapers below) share
+        # the same multiplier tile through a RingMAC.
         m.submodules.server = server = mac.RingMACServer()
         svfs = [dsp.SVF(macp=server.new_client()) for _ in range(n_voices)]
 
@@ -171,17 +174,18 @@ class PolySynth(wiring.Component):
 
         # Stereo HPF to remove DC from any voices in 'zero cutoff'
         # Route to audio output channels 2 & 3
+        # (one filter core, time-multiplexed across both channels)
 
-        output_hpfs = [dsp.DCBlock() for _ in range(o_channels)]
-        dsp.named_submodules(m.submodules, output_hpfs, override_name="output_hpf")
+        m.submodules.output_hpf = output_hpf = dsp.DCBlock(
+                n_channels=o_channels, macp=server.new_client())
+        wiring.connect(m, matrix_mix.o, output_hpf.i)
 
-        m.submodules.hpf_split2 = hpf_split2 = dsp.Split(n_channels=2, source=matrix_mix.o)
+        m.submodules.hpf_split2 = hpf_split2 = dsp.Split(n_channels=2, source=output_hpf.o)
         m.submodules.hpf_merge4 = hpf_merge4 = dsp.Merge(n_channels=4, sink=diffuser.i)
         hpf_merge4.wire_valid(m, [0, 1])
 
         for lr in [0, 1]:
-            wiring.connect(m, hpf_split2.o[lr], output_hpfs[lr].i)
-            wiring.connect(m, output_hpfs[lr].o, hpf_merge4.i[2+lr])
+            wiring.connect(m, hpf_split2.o[lr], hpf_merge4.i[2+lr])
 
         # Implement stereo distortion effect after diffuser.
 
@@ -196,9 +200,17 @@ class PolySynth(wiring.Component):
             return math.tanh(3.0*x)
 
         outs = []
+        waveshapers = []
         for lr in [0, 1]:
             vca = dsp.VCA()
-            waveshaper = dsp.WaveShaper(lut_function=scaled_tanh)
+            # Both channels evaluate the same function, so share one LUT.
+            if lr == 0:
+                waveshaper = dsp.WaveShaper(
+                    lut_function=scaled_tanh, macp=server.new_client())
+            else:
+                waveshaper = dsp.WaveShaper(
+                    shared_lut=waveshapers[0], macp=server.new_client())
+            waveshapers.append(waveshaper)
             vca_merge2 = dsp.Merge(n_channels=2)
             setattr(m.submodules, f"out_gainvca_{lr}", vca)
             setattr(m.submodules, f"out_waveshaper_{lr}", waveshaper)
@@ -237,7 +249,7 @@ class SynthPeripheral(wiring.Component):
         cutoff: csr.Field(csr.action.R, unsigned(8))
 
     class Matrix(csr.Register, access="w"):
-        """Mixing matrix coefficient: commit on write strobe, MatrixBusy set until done."""
+        """Mixing matrix coefficient: queued on write strobe, MatrixBusy set while the queue is full."""
         o_x:   csr.Field(csr.action.W, unsigned(4))
         i_y:   csr.Field(csr.action.W, unsigned(4))
         value: csr.Field(csr.action.W, signed(24))
@@ -311,23 +323,23 @@ class SynthPeripheral(wiring.Component):
                 voice.f.cutoff.r_data.eq(self.synth.voice_states[i].velocity_mod)
             ]
 
-        # matrix coefficient update logic
-        matrix_busy = Signal()
-        m.d.comb += self._matrix_busy.f.busy.r_data.eq(matrix_busy)
-        with m.If(self._matrix.element.w_stb & ~matrix_busy):
-            m.d.sync += [
-                matrix_busy.eq(1),
-                self.synth.diffuser.matrix.c.payload.o_x         .eq(self._matrix.f.o_x.w_data),
-                self.synth.diffuser.matrix.c.payload.i_y         .eq(self._matrix.f.i_y.w_data),
-                self.synth.diffuser.matrix.c.payload.v.as_value().eq(self._matrix.f.value.w_data),
-                self.synth.diffuser.matrix.c.valid.eq(1),
-            ]
-        with m.If(matrix_busy & self.synth.diffuser.matrix.c.ready):
-            # coefficient has been written
-            m.d.sync += [
-                matrix_busy.eq(0),
-                self.synth.diffuser.matrix.c.valid.eq(0),
-            ]
+        # matrix coefficient update logic. Coefficient writes are queued, so
+        # the SoC only has to wait on 'matrix_busy' if the queue is full.
+        matrix_c = self.synth.diffuser.matrix.c
+        matrix_coeff = Signal(matrix_c.payload.shape())
+        m.submodules.matrix_fifo = matrix_fifo = SyncFIFOBuffered(
+            width=len(matrix_coeff.as_value()), depth=4)
+        m.d.comb += [
+            self._matrix_busy.f.busy.r_data.eq(~matrix_fifo.w_rdy),
+            matrix_coeff.o_x         .eq(self._matrix.f.o_x.w_data),
+            matrix_coeff.i_y         .eq(self._matrix.f.i_y.w_data),
+            matrix_coeff.v.as_value().eq(self._matrix.f.value.w_data),
+            matrix_fifo.w_data.eq(matrix_coeff),
+            matrix_fifo.w_en.eq(self._matrix.element.w_stb),
+            matrix_c.valid.eq(matrix_fifo.r_stream.valid),
+            matrix_c.payload.eq(matrix_fifo.r_stream.payload),
+            matrix_fifo.r_stream.ready.eq(matrix_c.ready),
+        ]
 
         # MIDI injection and arbiter between SoC MIDI and HW MIDI -> synth MIDI.
         m.submodules.soc_midi_fifo = soc_midi_fifo = SyncFIFOBuffered(
@@ -336,9 +348,19 @@ class SynthPeripheral(wiring.Component):
             soc_midi_fifo.w_data.eq(self._midi_write.f.msg.w_data),
             soc_midi_fifo.w_en.eq(self._midi_write.element.w_stb),
         ]
-        wiring.connect(m, wiring.flipped(self.i_midi), self.synth.i_midi)
+        # SoC MIDI messages take priority. Only the selected source sees 'ready'.
         with m.If(soc_midi_fifo.r_stream.valid):
-            wiring.connect(m, soc_midi_fifo.r_stream, self.synth.i_midi)
+            m.d.comb += [
+                self.synth.i_midi.valid.eq(1),
+                self.synth.i_midi.payload.eq(soc_midi_fifo.r_stream.payload),
+                soc_midi_fifo.r_stream.ready.eq(self.synth.i_midi.ready),
+            ]
+        with m.Else():
+            m.d.comb += [
+                self.synth.i_midi.valid.eq(self.i_midi.valid),
+                self.synth.i_midi.payload.eq(self.i_midi.payload),
+                self.i_midi.ready.eq(self.synth.i_midi.ready),
+            ]
 
         # Pipe TRS MIDI -> SoC read FIFO so SoC can inspect external
         # MIDI traffic
@@ -347,14 +369,25 @@ class SynthPeripheral(wiring.Component):
         m.d.comb += [
             read_midi_fifo.w_data.eq(self.i_midi.payload),
             read_midi_fifo.w_en.eq(self.i_midi.valid & self.i_midi.ready),
-            read_midi_fifo.r_en.eq(self._midi_read.element.r_stb),
         ]
 
-        with m.If(read_midi_fifo.r_level != 0):
-            m.d.comb += self._midi_read.f.msg.r_data.eq(read_midi_fifo.r_data)
-        with m.Else():
-            m.d.comb += self._midi_read.f.msg.r_data.eq(0)
-
+        # The oldest message is moved from the FIFO to a register, such
+        # that CSR reads come straight from a register (0 if there is
+        # no message). Reading the CSR consumes the message.
+        midi_read_data  = Signal(24)
+        midi_read_valid = Signal()
+        m.d.comb += self._midi_read.f.msg.r_data.eq(midi_read_data)
+        with m.If(self._midi_read.element.r_stb):
+            m.d.sync += [
+                midi_read_data.eq(0),
+                midi_read_valid.eq(0),
+            ]
+        with m.Elif(~midi_read_valid & read_midi_fifo.r_rdy):
+            m.d.comb += read_midi_fifo.r_en.eq(1)
+            m.d.sync += [
+                midi_read_data.eq(read_midi_fifo.r_data),
+                midi_read_valid.eq(1),
+            ]
 
         return m
 
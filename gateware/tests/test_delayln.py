@@ -212,3 +212,55 @@ class DelayLineTests(unittest.TestCase):
         sim.add_process(stimulus_rd2)
         with sim.write_vcd(vcd_file=open("test_sram_delayln.vcd", "w")):
             sim.run()
+
+    @parameterized.expand([
+        ["pow2",     256, 4,  250],
+        ["non_pow2", 200, 4,  199],
+    ])
+    def test_sram_delayln_wrap(self, name, max_delay, tap1_delay, tap2_delay):
+
+        dut = delay_line.DelayLine(
+            max_delay=max_delay,
+            write_triggers_read=True,
+        )
+
+        tap1 = dut.add_tap(fixed_delay=tap1_delay)
+        tap2 = dut.add_tap(fixed_delay=tap2_delay)
+
+        def sample(n):
+            return fixed.Const(((n % 1000) - 500) / 1000, shape=ASQ)
+
+        n_samples = 2*max_delay + 50
+
+        async def stimulus_wr(ctx):
+            for n in range(n_samples):
+                ctx.set(dut.i.valid, 1)
+                ctx.set(dut.i.payload, sample(n))
+                await ctx.tick().until(dut.i.ready)
+                ctx.set(dut.i.valid, 0)
+                await ctx.tick().repeat(10)
+
+        def validate_tap(tap):
+            async def _validate_tap(ctx):
+                ctx.set(tap.o.ready, 1)
+                n_rd = 0
+                while True:
+                    await ctx.tick().until(tap.o.valid)
+                    # Output sample 'n' is read after the write of sample 'n'.
+                    if n_rd >= tap.fixed_delay:
+                        assert (ctx.get(tap.o.payload).as_float() ==
+                                sample(n_rd - tap.fixed_delay).as_float())
+                    n_rd += 1
+            return _validate_tap
+
+        async def testbench(ctx):
+            await ctx.tick().repeat(n_samples*12)
+
+        sim = Simulator(dut)
+        sim.add_clock(1e-6)
+        sim.add_process(stimulus_wr)
+        sim.add_testbench(validate_tap(tap1), background=True)
+        sim.add_testbench(validate_tap(tap2), background=True)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open(f"test_sram_delayln_wrap_{name}.vcd", "w")):
+            sim.run()
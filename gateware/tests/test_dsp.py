@@ -175,6 +175,81 @@ class DSPTests(unittest.TestCase):
         with sim.write_vcd(vcd_file=open(f"test_resample_{name}.vcd", "w")):
             sim.run()
 
+    @parameterized.expand([
+        ["mux_mac", mac.MuxMAC],
+        ["ring_mac", mac.RingMAC],
+    ])
+    def test_resample_multichannel(self, name, mac_type):
+
+        n_samples = 100
+        n_pad     = 4
+        n_align   = 1
+        n_up      = 4
+        tolerance = 0.005
+        stimulus_functions = [
+            lambda n: 0.4*(math.sin(n*0.2) + math.sin(n)),
+            lambda n: 0.4*(math.sin(n*0.3) + math.sin(n*0.7)),
+        ]
+        n_channels = len(stimulus_functions)
+
+        m = Module()
+        match mac_type:
+            case mac.RingMAC:
+                m.submodules.server = server = mac.RingMACServer()
+                macp = server.new_client()
+            case _:
+                macp = None
+        dut = dsp.Resample(fs_in=48000, n_up=n_up, m_down=1, order_mult=8,
+                           n_channels=n_channels, macp=macp)
+        m.submodules.dut = dut
+
+        def stimulus_values(ch):
+            """Create fixed-point samples to stimulate each DUT channel."""
+            for n in range(0, sys.maxsize):
+                yield fixed.Const(stimulus_functions[ch](n), shape=ASQ)
+
+        def expected_samples(ch):
+            """Each channel should match a single-channel resampler."""
+            x = [v.as_float() for v in itertools.islice(stimulus_values(ch), n_samples)]
+            x = [0]*n_pad + x
+            resampled = signal.resample_poly(x, n_up, 1, window=dut.filt.taps_float)
+            return resampled[n_align:-10]
+
+        async def stimulus_i(ctx):
+            """Send `stimulus_values` to all DUT channels."""
+            s = [stimulus_values(ch) for ch in range(n_channels)]
+            while True:
+                await ctx.tick().until(dut.i.ready)
+                ctx.set(dut.i.valid, 1)
+                for ch in range(n_channels):
+                    ctx.set(dut.i.payload[ch], next(s[ch]))
+                await ctx.tick()
+                ctx.set(dut.i.valid, 0)
+                await ctx.tick()
+
+        async def testbench(ctx):
+            """Verify every channel of the resampler outputs."""
+            y_expected = [expected_samples(ch) for ch in range(n_channels)]
+            n_samples_out = 0
+            ctx.set(dut.o.ready, 1)
+            for n in range(0, sys.maxsize):
+                if ctx.get(dut.o.valid & dut.o.ready):
+                    for ch in range(n_channels):
+                        assert abs(ctx.get(dut.o.payload[ch]).as_float() -
+                                   y_expected[ch][n_samples_out]) < tolerance
+                    n_samples_out += 1
+                    if n_samples_out == len(y_expected[0]):
+                        break
+                await ctx.tick()
+            assert n_samples_out == len(y_expected[0])
+
+        sim = Simulator(m)
+        sim.add_clock(1e-6)
+        sim.add_process(stimulus_i)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open(f"test_resample_multichannel_{name}.vcd", "w")):
+            sim.run()
+
     @parameterized.expand([
         ["mux_mac", mac.MuxMAC],
         ["ring_mac", mac.RingMAC],
@@ -353,6 +428,39 @@ class DSPTests(unittest.TestCase):
         with sim.write_vcd(vcd_file=open(f"test_waveshaper_{name}.vcd", "w")):
             sim.run()
 
+    def test_waveshaper_shared_lut(self):
+
+        def scaled_tanh(x):
+            return math.tanh(3.0*x)
+
+        m = Module()
+        m.submodules.ws0 = ws0 = dsp.WaveShaper(lut_function=scaled_tanh, lut_size=64)
+        m.submodules.ws1 = ws1 = dsp.WaveShaper(shared_lut=ws0)
+
+        async def testbench(ctx):
+            await ctx.tick()
+            for n in range(0, 50):
+                x0 = math.sin(n*0.10)
+                x1 = -0.8*math.sin(n*0.23)
+                for dut, x in [(ws0, x0), (ws1, x1)]:
+                    ctx.set(dut.i.payload, fixed.Const(x, shape=ASQ))
+                    ctx.set(dut.i.valid, 1)
+                    ctx.set(dut.o.ready, 1)
+                await ctx.tick()
+                for dut in [ws0, ws1]:
+                    ctx.set(dut.i.valid, 0)
+                while ctx.get(ws0.o.valid) != 1 or ctx.get(ws1.o.valid) != 1:
+                    await ctx.tick()
+                self.assertAlmostEqual(ctx.get(ws0.o.payload).as_float(), scaled_tanh(x0), places=1)
+                self.assertAlmostEqual(ctx.get(ws1.o.payload).as_float(), scaled_tanh(x1), places=1)
+                await ctx.tick()
+
+        sim = Simulator(m)
+        sim.add_clock(1e-6)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open("test_waveshaper_shared_lut.vcd", "w")):
+            sim.run()
+
     def test_gainvca(self):
 
         def scaled_tanh(x):
@@ -472,3 +580,39 @@ class DSPTests(unittest.TestCase):
         sim.add_testbench(testbench)
         with sim.write_vcd(vcd_file=open("test_dcblock.vcd", "w")):
             sim.run()
+
+    def test_dcblock_multichannel(self):
+
+        m = Module()
+        m.submodules.dut = dut = dsp.DCBlock(n_channels=2)
+        refs = [dsp.DCBlock() for _ in range(2)]
+        m.submodules += refs
+
+        async def testbench(ctx):
+            for n in range(0, 512):
+                xs = [fixed.Const(0.2+0.1*math.sin(n*0.2), shape=ASQ),
+                      fixed.Const(-0.3+0.1*math.sin(n*0.7), shape=ASQ)]
+                for c, ref in enumerate(refs):
+                    ctx.set(dut.i.payload[c], xs[c])
+                    ctx.set(ref.i.payload, xs[c])
+                    ctx.set(ref.i.valid, 1)
+                    ctx.set(ref.o.ready, 1)
+                ctx.set(dut.i.valid, 1)
+                ctx.set(dut.o.ready, 1)
+                await ctx.tick()
+                ctx.set(dut.i.valid, 0)
+                for ref in refs:
+                    ctx.set(ref.i.valid, 0)
+                while ctx.get(dut.o.valid) != 1:
+                    await ctx.tick()
+                # Both channels must match a dedicated filter exactly.
+                for c, ref in enumerate(refs):
+                    self.assertEqual(ctx.get(dut.o.payload[c]).as_value().value,
+                                     ctx.get(ref.o.payload).as_value().value)
+                await ctx.tick()
+
+        sim = Simulator(m)
+        sim.add_clock(1e-6)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open("test_dcblock_multichannel.vcd", "w")):
+            sim.run()
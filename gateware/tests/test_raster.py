@@ -3,18 +3,20 @@
 # SPDX-License-Identifier: CERN-OHL-S-2.0
 
 import math
+import random
 import sys
 import unittest
 
 from amaranth              import *
 from amaranth.sim          import *
-from amaranth.lib          import wiring
+from amaranth.lib          import wiring, data
 from tiliqua               import raster_persist, raster_stroke, test_util, eurorack_pmod, dma_framebuffer, dvi_modeline, palette
 
 from amaranth_soc          import csr
 from amaranth_soc.csr      import wishbone
 
 from amaranth_future       import fixed
+from parameterized         import parameterized
 
 class RasterTests(unittest.TestCase):
 
@@ -92,3 +94,169 @@ class RasterTests(unittest.TestCase):
         sim.add_process(stimulus)
         with sim.write_vcd(vcd_file=open("test_stroke.vcd", "w")):
             sim.run()
+
+    @parameterized.expand([
+        ["normal",      0],
+        ["rotate_left", 1],
+    ])
+    def test_stroke_render(self, name, rotate_left):
+
+        """
+        Draw a sequence of points into a simulated framebuffer memory, and
+        compare the result against a software reference renderer.
+        """
+
+        m = Module()
+        fb = dma_framebuffer.DMAFramebuffer(
+            fixed_modeline=self.MODELINE, palette=palette.ColorPalette())
+        dut = raster_stroke.Stroke(fb=fb)
+        m.submodules += [dut, fb, fb.palette]
+
+        fb_base   = 0x1000
+        scale     = 4
+        fb_hwords = (self.MODELINE.h_active*fb.bytes_per_pixel)//4
+        v_active  = self.MODELINE.v_active
+
+        rng = random.Random(1234)
+
+        # Random walk with repeated points, jumps to distant tiles and points
+        # far outside the screen. Intensity modulation covers points that
+        # saturate a pixel on their own, and points with zero intensity.
+        points = []
+        x, y = 0, 0
+        for _ in range(300):
+            r = rng.random()
+            if r < 0.1:
+                x, y = rng.randint(-32000, 32000), rng.randint(-32000, 32000)
+            else:
+                x = max(-32000, min(32000, x + rng.randint(-600, 600)))
+                y = max(-32000, min(32000, y + rng.randint(-600, 600)))
+            p = rng.choice([0, 0, 0, 7<<10, -8<<10, rng.randint(-8<<10, 8<<10-1)])
+            c = rng.randint(-8<<10, 8<<10-1)
+            for _ in range(rng.choice([1, 1, 1, 2, 4])):
+                points.append((x, y, p, c))
+
+        def initial(adr):
+            return (adr * 0x9E3779B1) & 0xffffffff
+
+        def reference():
+            mem = {}
+            drawn.clear()
+            for (x, y, p, c) in points:
+                px = x >> scale
+                py = (-y) >> scale
+                sx, sy = (-py, px) if rotate_left else (px, py)
+                x_offs = (fb_hwords//2 + (sx >> 2)) & 0xffff
+                y_offs = (sy + (v_active >> 1)) & 0xffff
+                if not (x_offs < fb_hwords and y_offs < v_active):
+                    continue
+                adr = fb_base + y_offs*fb_hwords + x_offs
+                index = sx & 3
+                intensity = (p >> 10) + 8
+                intensity = intensity if 0 < intensity <= 0xf else 0
+                color = ((c >> 10) + 10) & 0xf
+                word = mem.get(adr, initial(adr))
+                old = (word >> (8*index)) & 0xff
+                new = (min(0xf, (old >> 4) + intensity) << 4) | color
+                mem[adr] = (word & ~(0xff << (8*index))) | (new << (8*index))
+                drawn.add((adr, index))
+            return mem
+
+        async def stimulus(ctx):
+            ctx.set(dut.scale_x, scale)
+            ctx.set(dut.scale_y, scale)
+            ctx.set(dut.rotate_left, rotate_left)
+            ctx.set(fb.fb_base, fb_base)
+            for (x, y, p, c) in points:
+                ctx.set(dut.i.valid, 1)
+                ctx.set(dut.i.payload, [fixed.Const(v/2**15, shape=eurorack_pmod.ASQ)
+                                        for v in (x, y, p, c)])
+                await ctx.tick().until(dut.i.ready)
+                ctx.set(dut.i.valid, 0)
+                gap = rng.choice([0, 0, 1, 5, 20])
+                if gap:
+                    await ctx.tick().repeat(gap)
+            done.append(True)
+
+        mem = {}
+        done = []
+        # Pixels drawn by the reference, and byte lanes written on the bus.
+        drawn = set()
+        written = set()
+
+        async def testbench(ctx):
+            ctx.set(dut.enable, 1)
+            ctx.set(fb.enable, 1)
+            # Wishbone memory with variable ack delay, honouring `sel`. Stop
+            # once the bus has been idle for a while after the last point.
+            idle = 0
+            while not done or idle < 500:
+                if ctx.get(dut.bus.cyc & dut.bus.stb):
+                    idle = 0
+                    delay = rng.randint(0, 4)
+                    if delay:
+                        await ctx.tick().repeat(delay)
+                    adr = ctx.get(dut.bus.adr)
+                    word = mem.get(adr, initial(adr))
+                    if ctx.get(dut.bus.we):
+                        sel = ctx.get(dut.bus.sel)
+                        dat_w = ctx.get(dut.bus.dat_w)
+                        for n in range(4):
+                            if sel & (1 << n):
+                                written.add((adr, n))
+                                word = (word & ~(0xff << (8*n))) | (dat_w & (0xff << (8*n)))
+                        mem[adr] = word
+                    else:
+                        ctx.set(dut.bus.dat_r, word)
+                    ctx.set(dut.bus.ack, 1)
+                    await ctx.tick()
+                    ctx.set(dut.bus.ack, 0)
+                else:
+                    idle += 1
+                    await ctx.tick()
+
+        sim = Simulator(m)
+        sim.add_clock(1e-6)
+        sim.add_process(stimulus)
+        sim.add_testbench(testbench)
+        sim.run_until(2e-1)
+
+        expected = reference()
+        # Pixels not drawn must never be written back, even unmodified.
+        self.assertEqual(written - drawn, set())
+        for adr in set(expected) | set(mem):
+            self.assertEqual(hex(mem.get(adr, initial(adr))),
+                             hex(expected.get(adr, initial(adr))), f"adr={adr:#x}")
+
+    def test_tile_binner(self):
+
+        layout = data.StructLayout({
+            "adr": unsigned(16),
+            "index": unsigned(2),
+        })
+        dut = raster_stroke.TileBinner(layout=layout, depth=8, tile_bits=6)
+
+        # Records from 2 different tiles, interleaved.
+        adrs_in  = [0x000, 0x100, 0x001, 0x101, 0x002]
+        # Records come out grouped by tile, in order within each tile.
+        adrs_out = [0x000, 0x001, 0x002, 0x100, 0x101]
+
+        async def testbench(ctx):
+            for adr in adrs_in:
+                ctx.set(dut.i.valid, 1)
+                ctx.set(dut.i.payload.adr, adr)
+                await ctx.tick().until(dut.i.ready)
+            ctx.set(dut.i.valid, 0)
+            ctx.set(dut.o.ready, 1)
+            adrs = []
+            while len(adrs) != len(adrs_out):
+                if ctx.get(dut.o.valid):
+                    adrs.append(ctx.get(dut.o.payload.adr))
+                await ctx.tick()
+            self.assertEqual(adrs, adrs_out)
+
+        sim = Simulator(dut)
+        sim.add_clock(1e-6)
+        sim.add_testbench(testbench)
+        with sim.write_vcd(vcd_file=open("test_tile_binner.vcd", "w")):
+            sim.run()